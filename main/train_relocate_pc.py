@@ -1,14 +1,35 @@
+import multiprocessing as mp
+import sys
+import time
 from pathlib import Path
 
+import torch
 import torch.nn as nn
 
 from hand_env_utils.arg_utils import *
 from hand_env_utils.teleop_env import create_relocate_env
 from hand_env_utils.wandb_callback import WandbCallback, setup_wandb
+from stable_baselines3.common.buffers import PointCloudRolloutBuffer
 from stable_baselines3.common.torch_layers import PointNetExtractor
+from stable_baselines3.common.vec_env.dummy_vec_env import DummyVecEnv
+from stable_baselines3.common.vec_env.shmem_vec_env import ShmemVecEnv
 from stable_baselines3.common.vec_env.subproc_vec_env import SubprocVecEnv
 from stable_baselines3.ppo import PPO
 
+
+def benchmark_step_time(object_name, num_steps=100):
+    env = create_relocate_env(object_name, use_visual_obs=True)
+    env.reset()
+    tic = time.time()
+    for _ in range(num_steps):
+        _, _, done, _ = env.step(env.action_space.sample())
+        if done:
+            env.reset()
+    step_time = (time.time() - tic) / num_steps
+    env.close()
+    return step_time
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--n', type=int, default=100)
@@ -21,6 +42,11 @@ if __name__ == '__main__':
     parser.add_argument('--exp', type=str)
     parser.add_argument('--object_name', type=str)
     parser.add_argument('--use_bn', type=bool, default=True)
+    parser.add_argument('--vec_env', type=str, default="auto", choices=["auto", "shmem", "subproc", "dummy"])
+    parser.add_argument('--compile', action="store_true")
+    parser.add_argument('--bf16', action="store_true")
+    parser.add_argument('--morton_sort', action="store_true")
+    parser.add_argument('--prefetch_samples', action="store_true")
 
     args = parser.parse_args()
     object_name = args.object_name
@@ -40,7 +66,25 @@ if __name__ == '__main__':
         environment = create_relocate_env(object_name, use_visual_obs=True, is_eval=True)
         return environment
 
-    env = SubprocVecEnv([create_env_fn] * args.workers, "spawn")
+    vec_env_type = args.vec_env
+    if vec_env_type == "auto":
+        # Subprocesses only pay off when the env step is more expensive than the inter-process communication.
+        # The benchmark env is built in a spawned process, so that no renderer context is created in this process
+        # before the workers are forked.
+        with mp.get_context("spawn").Pool(1) as pool:
+            step_time = pool.apply(benchmark_step_time, (object_name,))
+        vec_env_type = "dummy" if step_time < 1e-3 else "shmem"
+        print(f"Mean env step time: {step_time * 1000:.3f} ms, using {vec_env_type} vec env")
+
+    if vec_env_type == "dummy":
+        env = DummyVecEnv([create_env_fn] * args.workers)
+    else:
+        # Fork on Linux avoids re-importing torch in every worker. It is only safe because no env
+        # (i.e. no SAPIEN renderer or CUDA context) has been created in this process.
+        start_method = "fork" if sys.platform.startswith("linux") else "spawn"
+        # The shared memory version does not pickle the point cloud observations at each step
+        vec_env_class = ShmemVecEnv if vec_env_type == "shmem" else SubprocVecEnv
+        env = vec_env_class([create_env_fn] * args.workers, start_method)
 
     print(env.observation_space, env.action_space)
 
@@ -59,7 +103,7 @@ if __name__ == '__main__':
     }
 
     config = {'n_env_horizon': args.n, 'object_name': args.object_name, 'update_iteration': args.iter,
-              'total_step': env_iter, "use_bn": args.use_bn, "policy_kwargs": policy_kwargs}
+              'total_step': env_iter, "use_bn": args.use_bn, "bf16": args.bf16, "policy_kwargs": policy_kwargs}
     wandb_run = setup_wandb(config, exp_name, tags=["point_cloud", "relocate", object_name])
 
     model = PPO("PointCloudPolicy", env, verbose=1,
@@ -69,13 +113,37 @@ if __name__ == '__main__':
                 batch_size=args.bs,
                 seed=args.seed,
                 policy_kwargs=policy_kwargs,
+                rollout_buffer_class=PointCloudRolloutBuffer,
+                rollout_buffer_kwargs={
+                    "pc_key": "relocate-point_cloud",
+                    "morton_sort": args.morton_sort,
+                    "prefetch_samples": args.prefetch_samples,
+                },
                 tensorboard_log=str(result_path / "log"),
                 min_lr=1e-4,
                 max_lr=args.lr,
                 adaptive_kl=0.02,
                 target_kl=0.1,
+                use_bf16=args.bf16,
                 )
 
+    if args.compile:
+        if hasattr(torch, "compile"):
+            # The minibatch shapes are fixed by batch_size, only the last minibatch of an epoch may trigger a recompile
+            model.policy.evaluate_actions = torch.compile(
+                model.policy.evaluate_actions, mode="reduce-overhead", dynamic=False
+            )
+            # The extractor is also used by the rollout forward. The number of points is fixed, so dynamic=False
+            # specializes it to the point cloud shape. The BN fusion is done outside of it, in collect_rollouts.
+            # Replacing forward instead of the module keeps the state dict keys unchanged.
+            extractor = model.policy.features_extractor
+            extractor.forward = torch.compile(extractor.forward, dynamic=False)
+            if hasattr(torch, "_logging"):
+                # Report the graph breaks and recompilations, which would defeat the specialization
+                torch._logging.set_logs(graph_breaks=True, recompiles=True)
+        else:
+            print(f"torch.compile is not available in torch {torch.__version__}, skipping compilation")
+
     model.learn(
         total_timesteps=int(env_iter),
         callback=WandbCallback(
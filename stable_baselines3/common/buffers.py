@@ -1,6 +1,9 @@
+import queue
+import threading
 import warnings
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Generator, List, Optional, Union
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, List, NamedTuple, Optional, Union
 import stable_baselines3.pickle_utils as pickle_utils
 import numpy as np
 import torch as th
@@ -17,6 +20,9 @@ from stable_baselines3.common.type_aliases import (
 
 from stable_baselines3.common.vec_env import VecNormalize
 
+# Set while sampling on a side CUDA stream (see ``BaseBuffer._copy_stream()``), the copies then go through pinned memory
+_prefetch_local = threading.local()
+
 try:
     # Check memory used by replay buffer when possible
     import psutil
@@ -132,10 +138,47 @@ class BaseBuffer(ABC):
             (may be useful to avoid changing things be reference)
         :return:
         """
+        if getattr(_prefetch_local, "pin_memory", False):
+            # Going through pinned memory makes the host to device copy asynchronous
+            return th.from_numpy(np.ascontiguousarray(array)).pin_memory().to(self.device, non_blocking=True)
         if copy:
             return th.tensor(array).to(self.device)
         return th.as_tensor(array).to(self.device)
 
+    @contextmanager
+    def _copy_stream(self, stream: th.cuda.Stream) -> Generator[None, None, None]:
+        """
+        Run the samplings done in this context on a side CUDA stream, with non-blocking copies.
+        The streams are created by the callers for each pass over the data, and not stored,
+        so that the buffers can still be pickled.
+
+        :param stream: The side stream
+        """
+        pin_memory = getattr(_prefetch_local, "pin_memory", False)
+        _prefetch_local.pin_memory = True
+        try:
+            with th.cuda.stream(stream):
+                yield
+        finally:
+            _prefetch_local.pin_memory = pin_memory
+
+    def _wait_copy_stream(self, samples: NamedTuple, stream: th.cuda.Stream) -> NamedTuple:
+        """
+        Make the current stream wait for the copies of ``samples`` done in ``_copy_stream()``.
+
+        :param samples: Samples (possibly with dict fields) created on the side stream
+        :param stream: The side stream
+        :return: The samples, ready to be used on the current stream
+        """
+        current_stream = th.cuda.current_stream(self.device)
+        current_stream.wait_stream(stream)
+        # The tensors were allocated on the side stream but are used on the current one
+        for field in samples:
+            for tensor in field.values() if isinstance(field, dict) else (field,):
+                if isinstance(tensor, th.Tensor):
+                    tensor.record_stream(current_stream)
+        return samples
+
     @staticmethod
     def _normalize_obs(
         obs: Union[np.ndarray, Dict[str, np.ndarray]],
@@ -387,6 +430,64 @@ class ReplayBuffer(BaseBuffer):
         )
         return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
 
+    def prefetch(
+        self, batch_size: int, n_batches: int, env: Optional[VecNormalize] = None, n_prefetch: int = 4
+    ) -> Generator[Union[ReplayBufferSamples, DictReplayBufferSamples], None, None]:
+        """
+        Sample ``n_batches`` minibatches, preparing up to ``n_prefetch`` of them in advance.
+
+        On GPU and for more than one minibatch, the sampling and the host to device copies
+        (through pinned memory) run in a background thread on a side CUDA stream,
+        so they are hidden behind the gradient steps.
+        The content of the buffer must not change until the generator is exhausted.
+
+        :param batch_size: Number of element in each minibatch
+        :param n_batches: Number of minibatches to sample
+        :param env: associated gym VecEnv
+            to normalize the observations/rewards when sampling
+        :param n_prefetch: Maximum number of minibatches sampled ahead
+        :return:
+        """
+        if th.device(self.device).type != "cuda" or n_batches <= 1:
+            for _ in range(n_batches):
+                yield self.sample(batch_size, env=env)
+            return
+
+        copy_stream = th.cuda.Stream(device=self.device)
+        samples_queue = queue.Queue(maxsize=n_prefetch)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            # Give up when the consumer stopped early, instead of blocking on a full queue
+            while not stop.is_set():
+                try:
+                    samples_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def producer() -> None:
+            try:
+                with self._copy_stream(copy_stream):
+                    for _ in range(n_batches):
+                        if not put(self.sample(batch_size, env=env)):
+                            return
+            except Exception as e:
+                put(e)
+
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        try:
+            for _ in range(n_batches):
+                samples = samples_queue.get()
+                if isinstance(samples, Exception):
+                    raise samples
+                yield self._wait_copy_stream(samples, copy_stream)
+        finally:
+            stop.set()
+            thread.join()
+
 
 class RolloutBuffer(BaseBuffer):
     """
@@ -518,6 +619,17 @@ class RolloutBuffer(BaseBuffer):
         if self.pos == self.buffer_size:
             self.full = True
 
+    def set_last_rewards(self, reward: np.ndarray) -> None:
+        """
+        Set the rewards of the last added transition.
+        Used when the transition is added before the env step has returned
+        (the rewards passed to ``add()`` are then placeholders).
+
+        :param reward:
+        """
+        assert self.pos > 0, "No transition was added"
+        self.rewards[self.pos - 1] = np.array(reward).copy()
+
     def get(self, batch_size: Optional[int] = None) -> Generator[RolloutBufferSamples, None, None]:
         assert self.full, ""
         indices = np.random.permutation(self.buffer_size * self.n_envs)
@@ -737,6 +849,9 @@ class DictRolloutBuffer(RolloutBuffer):
         Equivalent to Monte-Carlo advantage estimate when set to 1.
     :param gamma: Discount factor
     :param n_envs: Number of parallel environments
+    :param prefetch_samples: Whether to copy the next minibatch while the current one is used.
+        Only used on CUDA devices, the copies then go through pinned memory
+        with non-blocking transfers on a side CUDA stream.
     """
 
     def __init__(
@@ -748,6 +863,7 @@ class DictRolloutBuffer(RolloutBuffer):
         gae_lambda: float = 1,
         gamma: float = 0.99,
         n_envs: int = 1,
+        prefetch_samples: bool = False,
     ):
 
         super(RolloutBuffer, self).__init__(buffer_size, observation_space, action_space, device, n_envs=n_envs)
@@ -759,6 +875,7 @@ class DictRolloutBuffer(RolloutBuffer):
         self.observations, self.actions, self.rewards, self.advantages = None, None, None, None
         self.returns, self.episode_starts, self.values, self.log_probs = None, None, None, None
         self.generator_ready = False
+        self.prefetch_samples = prefetch_samples
         self.reset()
 
     def reset(self) -> None:
@@ -836,9 +953,23 @@ class DictRolloutBuffer(RolloutBuffer):
             batch_size = self.buffer_size * self.n_envs
 
         start_idx = 0
+        if not self.prefetch_samples or th.device(self.device).type != "cuda":
+            while start_idx < self.buffer_size * self.n_envs:
+                yield self._get_samples(indices[start_idx : start_idx + batch_size])
+                start_idx += batch_size
+            return
+
+        # Copy the next minibatch on a side stream while the current one is consumed
+        copy_stream = th.cuda.Stream(device=self.device)
+        with self._copy_stream(copy_stream):
+            next_samples = self._get_samples(indices[start_idx : start_idx + batch_size])
         while start_idx < self.buffer_size * self.n_envs:
-            yield self._get_samples(indices[start_idx : start_idx + batch_size])
+            samples = self._wait_copy_stream(next_samples, copy_stream)
             start_idx += batch_size
+            if start_idx < self.buffer_size * self.n_envs:
+                with self._copy_stream(copy_stream):
+                    next_samples = self._get_samples(indices[start_idx : start_idx + batch_size])
+            yield samples
 
     def _get_samples(self, batch_inds: np.ndarray, env: Optional[VecNormalize] = None) -> DictRolloutBufferSamples:
 
@@ -852,6 +983,125 @@ class DictRolloutBuffer(RolloutBuffer):
         )
 
 
+def _part1by2(x: np.ndarray) -> np.ndarray:
+    """
+    Spread the 10 lower bits of ``x`` so that there are two zero bits between each of them.
+    """
+    x = x & 0x000003FF
+    x = (x | (x << 16)) & 0x030000FF
+    x = (x | (x << 8)) & 0x0300F00F
+    x = (x | (x << 4)) & 0x030C30C3
+    x = (x | (x << 2)) & 0x09249249
+    return x
+
+
+def morton_order(points: np.ndarray) -> np.ndarray:
+    """
+    Compute the permutation sorting each point cloud along a 30 bits Morton (Z-order) curve,
+    so that points close in space are also close in memory.
+
+    :param points: Point clouds of shape (..., n_points, 3)
+    :return: Indices of shape (..., n_points) sorting each point cloud
+    """
+    bbox_min = points.min(axis=-2, keepdims=True)
+    extent = np.maximum(points.max(axis=-2, keepdims=True) - bbox_min, 1e-8)
+    grid = ((points - bbox_min) / extent * 1023).astype(np.uint32)
+    codes = _part1by2(grid[..., 0]) | (_part1by2(grid[..., 1]) << 1) | (_part1by2(grid[..., 2]) << 2)
+    return np.argsort(codes, axis=-1, kind="stable")
+
+
+class PointCloudRolloutBuffer(DictRolloutBuffer):
+    """
+    Dict Rollout buffer that stores the point cloud observation with a reduced precision.
+
+    Point coordinates are bounded by the workspace (around one meter), so half precision
+    is enough for the policy while it halves the memory of the buffer and the bytes
+    moved to the device for each minibatch. The point cloud is converted back to float32
+    on the device when sampling.
+
+    The point cloud is also stored channels first, with shape (buffer_size, n_envs, 3, n_points),
+    i.e. the x, y and z coordinates of a cloud are each contiguous. The sampled point cloud is a
+    transposed view with the usual (batch_size, n_points, 3) shape, so the ``transpose(1, 2)`` done
+    by ``PointNetExtractor`` gives back a contiguous (batch_size, 3, n_points) input for the convolutions.
+
+    Optionally, each point cloud is sorted along a Morton curve when it is added, for a better
+    spatial locality of the points. Only the point cloud key is reordered, so this should not be
+    used together with other per-point observations.
+
+    :param buffer_size: Max number of element in the buffer
+    :param observation_space: Observation space
+    :param action_space: Action space
+    :param device:
+    :param gae_lambda: Factor for trade-off of bias vs variance for Generalized Advantage Estimator
+        Equivalent to Monte-Carlo advantage estimate when set to 1.
+    :param gamma: Discount factor
+    :param n_envs: Number of parallel environments
+    :param pc_key: Key of the point cloud in the observation dict
+    :param pc_dtype: Dtype used to store the point cloud
+    :param morton_sort: Whether to sort each point cloud in Morton order when it is added
+    :param prefetch_samples: Whether to copy the next minibatch while the current one is used (CUDA only)
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        observation_space: spaces.Space,
+        action_space: spaces.Space,
+        device: Union[th.device, str] = "cpu",
+        gae_lambda: float = 1,
+        gamma: float = 0.99,
+        n_envs: int = 1,
+        pc_key: str = "relocate-point_cloud",
+        pc_dtype: np.dtype = np.float16,
+        morton_sort: bool = False,
+        prefetch_samples: bool = False,
+    ):
+        assert pc_key in observation_space.spaces, f"Point cloud key {pc_key} not in observation space"
+        self.pc_key = pc_key
+        self.pc_dtype = pc_dtype
+        self.morton_sort = morton_sort
+        super().__init__(
+            buffer_size,
+            observation_space,
+            action_space,
+            device,
+            gae_lambda,
+            gamma,
+            n_envs=n_envs,
+            prefetch_samples=prefetch_samples,
+        )
+
+    def reset(self) -> None:
+        super().reset()
+        num_points, pc_dim = self.obs_shape[self.pc_key]
+        pc_shape = (self.buffer_size, self.n_envs, pc_dim, num_points)
+        self.observations[self.pc_key] = np.zeros(pc_shape, dtype=self.pc_dtype)
+
+    def add(
+        self,
+        obs: Dict[str, np.ndarray],
+        action: np.ndarray,
+        reward: np.ndarray,
+        episode_start: np.ndarray,
+        value: th.Tensor,
+        log_prob: th.Tensor,
+    ) -> None:
+        obs = dict(obs)
+        points = np.asarray(obs[self.pc_key])
+        if self.morton_sort:
+            # Sorted once here, the order is then reused by every gradient epoch
+            points = np.take_along_axis(points, morton_order(points)[..., None], axis=-2)
+        obs[self.pc_key] = np.swapaxes(points, -1, -2)
+        super().add(obs, action, reward, episode_start, value, log_prob)
+
+    def _get_samples(self, batch_inds: np.ndarray, env: Optional[VecNormalize] = None) -> DictRolloutBufferSamples:
+        samples = super()._get_samples(batch_inds, env=env)
+        # Only the reduced precision values are transferred, cast on the device
+        # and expose the (batch_size, n_points, 3) shape expected by the policy
+        samples.observations[self.pc_key] = samples.observations[self.pc_key].to(th.float32).transpose(1, 2)
+        return samples
+
+
 class DictSSLRolloutBuffer(RolloutBuffer):
     """
     Dict Rollout buffer used in on-policy algorithms like A2C/PPO.
@@ -34,6 +34,9 @@ class OnPolicyAlgorithm(BaseAlgorithm):
         instead of action noise exploration (default: False)
     :param sde_sample_freq: Sample a new noise matrix every n steps when using gSDE
         Default: -1 (only sample at the beginning of the rollout)
+    :param rollout_buffer_class: Rollout buffer class to use.
+        If ``None``, it will be automatically selected.
+    :param rollout_buffer_kwargs: Keyword arguments to pass to the rollout buffer on creation.
     :param tensorboard_log: the log location for tensorboard (if None, no logging)
     :param create_eval_env: Whether to create a second environment that will be
         used for evaluating the agent periodically. (Only available when passing string for the environment)
@@ -61,6 +64,8 @@ class OnPolicyAlgorithm(BaseAlgorithm):
         max_grad_norm: float,
         use_sde: bool,
         sde_sample_freq: int,
+        rollout_buffer_class: Optional[Type[RolloutBuffer]] = None,
+        rollout_buffer_kwargs: Optional[Dict[str, Any]] = None,
         tensorboard_log: Optional[str] = None,
         create_eval_env: bool = False,
         monitor_wrapper: bool = True,
@@ -95,6 +100,10 @@ class OnPolicyAlgorithm(BaseAlgorithm):
         self.vf_coef = vf_coef
         self.max_grad_norm = max_grad_norm
         self.rollout_buffer = None
+        self.rollout_buffer_class = rollout_buffer_class
+        if rollout_buffer_kwargs is None:
+            rollout_buffer_kwargs = {}
+        self.rollout_buffer_kwargs = rollout_buffer_kwargs
 
         self.last_rollout_reward = 0
 
@@ -105,9 +114,13 @@ class OnPolicyAlgorithm(BaseAlgorithm):
         self._setup_lr_schedule()
         self.set_random_seed(self.seed)
 
-        buffer_cls = DictRolloutBuffer if isinstance(self.observation_space, gym.spaces.Dict) else RolloutBuffer
+        if self.rollout_buffer_class is None:
+            if isinstance(self.observation_space, gym.spaces.Dict):
+                self.rollout_buffer_class = DictRolloutBuffer
+            else:
+                self.rollout_buffer_class = RolloutBuffer
 
-        self.rollout_buffer = buffer_cls(
+        self.rollout_buffer = self.rollout_buffer_class(
             self.n_steps,
             self.observation_space,
             self.action_space,
@@ -115,6 +128,7 @@ class OnPolicyAlgorithm(BaseAlgorithm):
             gamma=self.gamma,
             gae_lambda=self.gae_lambda,
             n_envs=self.n_envs,
+            **self.rollout_buffer_kwargs,
         )
         self.policy = self.policy_class(  # pytype:disable=not-instantiable
             self.observation_space,
@@ -148,6 +162,10 @@ class OnPolicyAlgorithm(BaseAlgorithm):
         assert self._last_obs is not None, "No previous observation was provided"
         # Switch to eval mode (this affects batch norm / dropout)
         self.policy.set_training_mode(False)
+        # The parameters do not change during the rollout, fold the batch norm layers of the extractor if possible
+        fuse_for_eval = getattr(self.policy.features_extractor, "fuse_for_eval", None)
+        if fuse_for_eval is not None:
+            fuse_for_eval()
 
         self.last_rollout_reward = 0
         num_rollouts = 0
@@ -177,7 +195,21 @@ class OnPolicyAlgorithm(BaseAlgorithm):
             if isinstance(self.action_space, gym.spaces.Box):
                 clipped_actions = np.clip(actions, self.action_space.low, self.action_space.high)
 
-            new_obs, rewards, dones, infos = env.step(clipped_actions)
+            env.step_async(clipped_actions)
+
+            if isinstance(self.action_space, gym.spaces.Discrete):
+                # Reshape in case of discrete action
+                actions = actions.reshape(-1, 1)
+
+            # Store the current transition while the workers are stepping (the rewards are filled in below),
+            # this hides the observation copy/conversion of the buffer behind the env simulation.
+            # If the callback stops the rollout below, this transition keeps placeholder rewards,
+            # which is fine as the buffer is then discarded (learn() stops and the next rollout resets it).
+            rollout_buffer.add(
+                self._last_obs, actions, np.zeros(env.num_envs), self._last_episode_starts, values, log_probs
+            )
+
+            new_obs, rewards, dones, infos = env.step_wait()
 
             self.num_timesteps += env.num_envs
 
@@ -189,10 +221,6 @@ class OnPolicyAlgorithm(BaseAlgorithm):
             self._update_info_buffer(infos)
             n_steps += 1
 
-            if isinstance(self.action_space, gym.spaces.Discrete):
-                # Reshape in case of discrete action
-                actions = actions.reshape(-1, 1)
-
             # Handle timeout by bootstraping with value function
             # see GitHub issue #633
             for idx, done in enumerate(dones):
@@ -211,7 +239,7 @@ class OnPolicyAlgorithm(BaseAlgorithm):
 
             self.last_rollout_reward += rewards.sum()
 
-            rollout_buffer.add(self._last_obs, actions, rewards, self._last_episode_starts, values, log_probs)
+            rollout_buffer.set_last_rewards(rewards)
             self._last_obs = new_obs
             self._last_episode_starts = dones
 
@@ -188,13 +188,59 @@ class BaseModel(nn.Module, ABC):
         model.to(device)
         return model
 
+    def _flat_parameters(self) -> Optional[th.Tensor]:
+        """
+        Get a 1D tensor that holds all the parameters of the model.
+        The first time, the parameters are re-allocated as views of this tensor, which is rebuilt
+        when the first parameter does not point to it anymore (e.g. after ``.to(device)`` or a copy).
+        The parameters must not be re-assigned through ``param.data`` in between.
+
+        :return: The flat tensor or None if the parameters do not share a dtype and device,
+            or if some of them are already flattened by another model (e.g. a shared features extractor).
+        """
+        flat_params = self.__dict__.get("_flat_params")
+        first_param = next(self.parameters(), None)
+        if flat_params is not None and first_param is not None and first_param.data_ptr() == flat_params.data_ptr():
+            return flat_params
+
+        params = list(self.parameters())
+        for param in params:
+            if getattr(param, "_flat_owner", id(self)) != id(self):
+                return None
+        if len(params) == 0 or len({(param.dtype, param.device) for param in params}) > 1:
+            return None
+
+        flat_params = th.cat([param.detach().reshape(-1) for param in params])
+        offset = 0
+        for param in params:
+            param.data = flat_params[offset : offset + param.numel()].view_as(param)
+            offset += param.numel()
+            # Id of the owner (picklable, unlike a weakref), to detect the parameters shared with another model
+            param._flat_owner = id(self)
+        self._flat_params = flat_params
+        return flat_params
+
     def load_from_vector(self, vector: np.ndarray) -> None:
         """
         Load parameters from a 1D vector.
 
         :param vector:
         """
-        th.nn.utils.vector_to_parameters(th.FloatTensor(vector).to(self.device), self.parameters())
+        flat_params = self._flat_parameters()
+        if flat_params is None:
+            params = list(self.parameters())
+            vector = th.as_tensor(vector, device=self.device)
+            assert vector.numel() == sum(param.numel() for param in params), "Vector size does not match the parameters"
+            # Copy in place, so that the views of the parameters held by another model stay valid
+            offset = 0
+            with th.no_grad():
+                for param in params:
+                    param.copy_(vector[offset : offset + param.numel()].view_as(param))
+                    offset += param.numel()
+            return
+        assert np.size(vector) == flat_params.numel(), "Vector size does not match the parameters"
+        with th.no_grad():
+            flat_params.copy_(th.as_tensor(vector, dtype=flat_params.dtype))
 
     def parameters_to_vector(self) -> np.ndarray:
         """
@@ -202,7 +248,13 @@ class BaseModel(nn.Module, ABC):
 
         :return:
         """
-        return th.nn.utils.parameters_to_vector(self.parameters()).detach().cpu().numpy()
+        flat_params = self._flat_parameters()
+        if flat_params is None:
+            return th.nn.utils.parameters_to_vector(self.parameters()).detach().cpu().numpy()
+        # Do not return a view of the parameters when they are already on cpu
+        if flat_params.device.type == "cpu":
+            return flat_params.detach().clone().numpy()
+        return flat_params.detach().cpu().numpy()
 
     def set_training_mode(self, mode: bool) -> None:
         """
@@ -629,19 +681,27 @@ class ActorCriticPolicy(BasePolicy):
         """
         return self.get_distribution(observation).get_actions(deterministic=deterministic)
 
-    def evaluate_actions(self, obs: th.Tensor, actions: th.Tensor) -> Tuple[th.Tensor, th.Tensor, th.Tensor]:
+    def evaluate_actions(
+        self, obs: th.Tensor, actions: th.Tensor, use_bf16: bool = False
+    ) -> Tuple[th.Tensor, th.Tensor, th.Tensor]:
         """
         Evaluate actions according to the current policy,
         given the observations.
 
         :param obs:
         :param actions:
+        :param use_bf16: Whether to run the features extractor and the shared MLP under bfloat16 autocast
         :return: estimated value, log likelihood of taking those actions
             and entropy of the action distribution.
         """
-        # Preprocess the observation if needed
-        features = self.extract_features(obs)
-        latent_pi, latent_vf = self.mlp_extractor(features)
+        with th.autocast(device_type=self.device.type, dtype=th.bfloat16, enabled=use_bf16):
+            # Preprocess the observation if needed
+            features = self.extract_features(obs)
+            latent_pi, latent_vf = self.mlp_extractor(features)
+        # The heads and the distribution run in float32. The latents still carry the bf16 rounding
+        # of the features extractor and the shared MLP, so the log probabilities only approximate
+        # the float32 ones of the rollout (the ratio is not exactly 1 at the first minibatch)
+        latent_pi, latent_vf = latent_pi.float(), latent_vf.float()
         distribution = self._get_action_dist_from_latent(latent_pi)
         log_prob = distribution.log_prob(actions)
         values = self.value_net(latent_vf)
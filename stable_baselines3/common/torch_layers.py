@@ -322,11 +322,26 @@ def get_actor_critic_arch(net_arch: Union[List[int], Dict[str, List[int]]]) -> T
 
 class PointNetExtractor(BaseFeaturesExtractor):
     """
+    PointNet features extractor for Dict observation spaces containing a point cloud.
+
+    The observations of all the parallel environments are stacked by the ``VecEnv``,
+    so the point cloud arrives with shape (n_envs, n_points, 3) and is processed
+    in a single forward pass during rollout collection (batch norm layers use their
+    running statistics since the policy is in eval mode at that time).
+
     :param observation_space:
+    :param pc_key: Key of the point cloud in the observation dict, of shape (n_points, 3)
+    :param feat_key: Optional key for per-point features, of shape (n_points, m)
+    :param use_bn: Whether to use batch normalization in the PointNet MLPs
+    :param local_channels: Number of channels of the per-point (local) MLP
+    :param global_channels: Number of channels of the MLP applied after max-pooling
+    :param one_hot_dim: Number of extra per-point channels appended by subclasses
+    :param tile_size: If not None, max-pool over tiles of ``tile_size`` points to reduce activation memory
     """
 
     def __init__(self, observation_space: gym.spaces.Dict, pc_key: str, feat_key: Optional[str] = None, use_bn=True,
-                 local_channels=(64, 128, 256), global_channels=(256,), one_hot_dim=0):
+                 local_channels=(64, 128, 256), global_channels=(256,), one_hot_dim=0,
+                 tile_size: Optional[int] = None):
         if feat_key is not None:
             if feat_key not in list(observation_space.keys()):
                 raise RuntimeError(f"Feature key {feat_key} not in observation space.")
@@ -350,7 +365,7 @@ class PointNetExtractor(BaseFeaturesExtractor):
 
         n_input_channels = pc_dim + feat_dim + one_hot_dim
         self.point_net = PointNet(n_input_channels, local_channels=local_channels, global_channels=global_channels,
-                                  use_bn=use_bn)
+                                  use_bn=use_bn, tile_size=tile_size)
         self.n_input_channels = n_input_channels
         self.n_output_channels = self.point_net.out_channels
 
@@ -362,6 +377,16 @@ class PointNetExtractor(BaseFeaturesExtractor):
             feats = None
         return self.point_net(points, feats)["feature"]
 
+    def fuse_for_eval(self) -> None:
+        """
+        Fold the batch norm layers into the PointNet weights for eval mode.
+        Called by ``collect_rollouts()`` at the start of each rollout; the fused weights are used
+        by the forward passes without gradients until the next switch to training mode,
+        so call it again if the parameters are modified while in eval mode.
+        """
+        if self.point_net.use_bn:
+            self.point_net.fuse_bn()
+
 
 class PointNetImaginationExtractor(PointNetExtractor):
     def __init__(self, observation_space: gym.spaces.Dict, pc_key: str, use_bn=True,
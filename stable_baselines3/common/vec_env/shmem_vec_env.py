@@ -0,0 +1,182 @@
+import multiprocessing as mp
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import gym
+import numpy as np
+
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv, VecEnvObs, VecEnvStepReturn
+from stable_baselines3.common.vec_env.subproc_vec_env import SubprocVecEnv
+from stable_baselines3.common.vec_env.util import dict_to_obs, obs_space_info
+
+# (key, shared memory name, shape, dtype) for each observation key
+ShmemLayout = List[Tuple[Any, str, Tuple[int, ...], np.dtype]]
+
+
+def _obs_items(observation: Any) -> List[Tuple[Any, np.ndarray]]:
+    if isinstance(observation, dict):
+        return list(observation.items())
+    elif isinstance(observation, tuple):
+        return list(enumerate(observation))
+    return [(None, observation)]
+
+
+def _worker(
+    remote: mp.connection.Connection, parent_remote: mp.connection.Connection, env_fn_wrapper: CloudpickleWrapper
+) -> None:
+    # Import here to avoid a circular import
+    from stable_baselines3.common.env_util import is_wrapped
+
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    shmems, obs_bufs, env_idx = [], {}, None
+
+    def write_obs(observation: Any) -> None:
+        for key, value in _obs_items(observation):
+            obs_bufs[key][env_idx] = value
+
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                observation, reward, done, info = env.step(data)
+                if done:
+                    # save final observation where user can get it, then reset
+                    info["terminal_observation"] = observation
+                    observation = env.reset()
+                write_obs(observation)
+                remote.send((reward, done, info))
+            elif cmd == "seed":
+                remote.send(env.seed(data))
+            elif cmd == "reset":
+                write_obs(env.reset())
+                remote.send(None)
+            elif cmd == "render":
+                remote.send(env.render(data))
+            elif cmd == "close":
+                env.close()
+                # Drop the numpy views before releasing the underlying memory
+                obs_bufs.clear()
+                for shmem in shmems:
+                    shmem.close()
+                remote.close()
+                break
+            elif cmd == "get_spaces":
+                remote.send((env.observation_space, env.action_space))
+            elif cmd == "attach_shmem":
+                env_idx, layout = data
+                for key, name, shape, dtype in layout:
+                    shmem = shared_memory.SharedMemory(name=name)
+                    shmems.append(shmem)
+                    obs_bufs[key] = np.ndarray(shape, dtype=dtype, buffer=shmem.buf)
+                remote.send(None)
+            elif cmd == "env_method":
+                method = getattr(env, data[0])
+                remote.send(method(*data[1], **data[2]))
+            elif cmd == "get_attr":
+                remote.send(getattr(env, data))
+            elif cmd == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == "is_wrapped":
+                remote.send(is_wrapped(env, data))
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except EOFError:
+            break
+
+
+class ShmemVecEnv(SubprocVecEnv):
+    """
+    Multiprocess vectorized environment that passes observations through shared memory.
+
+    It behaves like ``SubprocVecEnv``, but each worker writes its observation directly into
+    a pre-allocated shared memory buffer of shape (n_envs, ...) for every observation key.
+    Only the rewards, dones and infos go through the pipes, so large observations
+    (e.g. point clouds) are never pickled.
+
+    .. note::
+
+        The observations returned by ``reset()`` and ``step_wait()`` are copied out of
+        the shared buffers, as the workers overwrite them at the next step.
+
+    :param env_fns: Environments to run in subprocesses
+    :param start_method: method used to start the subprocesses.
+           Must be one of the methods returned by multiprocessing.get_all_start_methods().
+           Defaults to 'forkserver' on available platforms, and 'spawn' otherwise.
+    """
+
+    def __init__(self, env_fns: List[Callable[[], gym.Env]], start_method: Optional[str] = None):
+        self.waiting = False
+        self.closed = False
+        n_envs = len(env_fns)
+
+        if start_method is None:
+            # Fork is not a thread safe method (see issue #217)
+            # but is more user friendly (does not require to wrap the code in
+            # a `if __name__ == "__main__":`)
+            forkserver_available = "forkserver" in mp.get_all_start_methods()
+            start_method = "forkserver" if forkserver_available else "spawn"
+        ctx = mp.get_context(start_method)
+
+        # The workers must share the resource tracker of this process: otherwise each of them starts its own
+        # when attaching to the shared memory, which then unlinks the segments as soon as the worker exits
+        resource_tracker.ensure_running()
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for work_remote, remote, env_fn in zip(self.work_remotes, self.remotes, env_fns):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn))
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_worker, args=args, daemon=True)  # pytype:disable=attribute-error
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.remotes[0].send(("get_spaces", None))
+        observation_space, action_space = self.remotes[0].recv()
+        VecEnv.__init__(self, len(env_fns), observation_space, action_space)
+
+        # Allocate one shared buffer per observation key, for all the envs
+        self.keys, shapes, dtypes = obs_space_info(observation_space)
+        self.shmems: List[shared_memory.SharedMemory] = []
+        self.buf_obs: Dict[Any, np.ndarray] = OrderedDict()
+        layout: ShmemLayout = []
+        for key in self.keys:
+            shape = (n_envs,) + tuple(shapes[key])
+            dtype = np.dtype(dtypes[key])
+            shmem = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+            self.shmems.append(shmem)
+            self.buf_obs[key] = np.ndarray(shape, dtype=dtype, buffer=shmem.buf)
+            layout.append((key, shmem.name, shape, dtype))
+
+        for env_idx, remote in enumerate(self.remotes):
+            remote.send(("attach_shmem", (env_idx, layout)))
+        for remote in self.remotes:
+            remote.recv()
+
+    def step_wait(self) -> VecEnvStepReturn:
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        rews, dones, infos = zip(*results)
+        return self._obs_from_buf(), np.stack(rews), np.stack(dones), infos
+
+    def reset(self) -> VecEnvObs:
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        for remote in self.remotes:
+            remote.recv()
+        return self._obs_from_buf()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        # Drop the numpy views before releasing the underlying memory
+        self.buf_obs = OrderedDict()
+        for shmem in self.shmems:
+            shmem.close()
+            shmem.unlink()
+
+    def _obs_from_buf(self) -> VecEnvObs:
+        return dict_to_obs(self.observation_space, OrderedDict([(k, np.copy(v)) for k, v in self.buf_obs.items()]))
@@ -1,6 +1,8 @@
 # Code source from Jiayuan Gu: https://github.com/Jiayuan-Gu/torkit3d
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.checkpoint import checkpoint
 
 from ..common.mlp import mlp1d_bn_relu, mlp_bn_relu, mlp_relu, mlp1d_relu
 
@@ -12,6 +14,14 @@ class PointNet(nn.Module):
     Notes:
         1. The original implementation includes dropout for global MLPs.
         2. The original implementation decays the BN momentum.
+        3. If ``tile_size`` is given, the local MLP and the max-pooling are computed over tiles of points,
+           keeping a running maximum, so that only ``tile_size`` pointwise features are alive at once.
+           Tiling is disabled when training with batch normalization, as BN statistics need all the points.
+        4. After an explicit call to ``fuse_bn()``, the BN layers are folded into the weights of the preceding
+           conv/linear layers for the forward passes in eval mode without gradients, which removes one op
+           per layer. The fused weights are dropped when switching back to training mode, moving the module
+           or loading a state dict. They are not tracked otherwise: call ``fuse_bn()`` again after modifying
+           the parameters in eval mode (e.g. ``load_from_vector()``, ``polyak_update()``).
     """
 
     def __init__(
@@ -20,12 +30,14 @@ class PointNet(nn.Module):
             local_channels=(64, 64, 64, 128, 1024),
             global_channels=(512, 256),
             use_bn=True,
+            tile_size=None,
     ):
         super().__init__()
 
         self.in_channels = in_channels
         self.out_channels = (local_channels + global_channels)[-1]
         self.use_bn = use_bn
+        self.tile_size = tile_size
 
         if use_bn:
             self.mlp_local = mlp1d_bn_relu(in_channels, local_channels)
@@ -34,6 +46,11 @@ class PointNet(nn.Module):
             self.mlp_local = mlp1d_relu(in_channels, local_channels)
             self.mlp_global = mlp_relu(local_channels[-1], global_channels)
 
+        # Fused (weight, bias, relu) of the local and global MLPs, only used in eval mode
+        self._fused_mlps = None
+        # Tensors holding the fused weights, kept across fusions
+        self._fused_storage = None
+
         self.reset_parameters()
 
     def forward(self, points, points_feature=None, points_mask=None) -> dict:
@@ -43,15 +60,106 @@ class PointNet(nn.Module):
         else:
             input_feature = points
 
-        local_feature = self.mlp_local(input_feature)
+        # The fused weights are constants, only use them when no gradient is needed
+        use_fused = self._fused_mlps is not None and not self.training and not torch.is_grad_enabled()
+
+        if self.tile_size is None or (self.training and self.use_bn):
+            global_feature, max_indices = self._local_max_pool(input_feature, points_mask, use_fused)
+        else:
+            global_feature, max_indices = self._tiled_max_pool(input_feature, points_mask, use_fused)
+        if use_fused:
+            output_feature = self._fused_forward(global_feature, self._fused_mlps[1], F.linear)
+        else:
+            output_feature = self.mlp_global(global_feature)
+
+        return {"feature": output_feature, "max_indices": max_indices}
+
+    def _local_max_pool(self, input_feature, points_mask=None, use_fused=False):
+        if use_fused:
+            local_feature = self._fused_forward(input_feature, self._fused_mlps[0], F.conv1d)
+        else:
+            local_feature = self.mlp_local(input_feature)
         if points_mask is not None:
             local_feature = torch.where(
                 points_mask.unsqueeze(1), local_feature, torch.zeros_like(local_feature)
             )
-        global_feature, max_indices = torch.max(local_feature, 2)
-        output_feature = self.mlp_global(global_feature)
+        return torch.max(local_feature, 2)
 
-        return {"feature": output_feature, "max_indices": max_indices}
+    def _tiled_max_pool(self, input_feature, points_mask=None, use_fused=False):
+        global_feature, max_indices = None, None
+        for start in range(0, input_feature.shape[2], self.tile_size):
+            tile = input_feature[:, :, start:start + self.tile_size]
+            tile_mask = points_mask[:, start:start + self.tile_size] if points_mask is not None else None
+            if self.training and torch.is_grad_enabled():
+                # Recompute the tile activations during backward instead of storing them
+                tile_feature, tile_indices = checkpoint(self._local_max_pool, tile, tile_mask, use_reentrant=False)
+            else:
+                tile_feature, tile_indices = self._local_max_pool(tile, tile_mask, use_fused)
+            tile_indices = tile_indices + start
+            if global_feature is None:
+                global_feature, max_indices = tile_feature, tile_indices
+            else:
+                # Only replace on strict improvement so ties keep the earliest tile
+                update = tile_feature > global_feature
+                global_feature = torch.where(update, tile_feature, global_feature)
+                max_indices = torch.where(update, tile_indices, max_indices)
+        return global_feature, max_indices
+
+    @staticmethod
+    def _fused_forward(x, fused_layers, layer_fn):
+        for weight, bias, relu in fused_layers:
+            x = layer_fn(x, weight, bias)
+            if relu:
+                x = F.relu(x, inplace=True)
+        return x
+
+    @staticmethod
+    def _fuse_layer(weight, bias, bn):
+        # y = gamma * (w * x + b - mean) / sqrt(var + eps) + beta
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        fused_weight = weight * scale.view((-1,) + (1,) * (weight.dim() - 1))
+        if bias is None:
+            bias = torch.zeros_like(bn.running_mean)
+        fused_bias = (bias - bn.running_mean) * scale + bn.bias
+        return fused_weight, fused_bias
+
+    @torch.no_grad()
+    def fuse_bn(self):
+        """Fold the BN layers into the conv/linear weights, used in eval mode until the next switch to training mode."""
+        assert self.use_bn and not self.training, "BN can only be fused in eval mode"
+        fused_local = []
+        for layer in self.mlp_local:
+            weight, bias = self._fuse_layer(layer.conv.weight, layer.conv.bias, layer.bn)
+            fused_local.append((weight, bias, layer.relu is not None))
+        fused_global = []
+        for layer in self.mlp_global:
+            weight, bias = self._fuse_layer(layer.fc.weight, layer.fc.bias, layer.bn)
+            fused_global.append((weight, bias, layer.relu is not None))
+        if self._fused_storage is None:
+            self._fused_storage = (fused_local, fused_global)
+        else:
+            # Refresh in place, so that the same tensors are seen at each rollout (e.g. by torch.compile)
+            for (weight, bias, _), (new_weight, new_bias, _) in zip(
+                    self._fused_storage[0] + self._fused_storage[1], fused_local + fused_global
+            ):
+                weight.copy_(new_weight)
+                bias.copy_(new_bias)
+        self._fused_mlps = self._fused_storage
+
+    def train(self, mode=True):
+        if mode:
+            self._fused_mlps = None
+        return super().train(mode)
+
+    def _apply(self, *args, **kwargs):
+        # The fused weights are plain attributes, they would not follow a device or dtype change
+        self._fused_mlps = None
+        self._fused_storage = None
+        return super()._apply(*args, **kwargs)
+
+    def _load_from_state_dict(self, *args, **kwargs):
+        self._fused_mlps = None
+        super()._load_from_state_dict(*args, **kwargs)
 
     def reset_parameters(self):
         for name, module in self.named_modules():
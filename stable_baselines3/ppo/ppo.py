@@ -6,6 +6,7 @@ import torch as th
 from gym import spaces
 from torch.nn import functional as F
 
+from stable_baselines3.common.buffers import RolloutBuffer
 from stable_baselines3.common.on_policy_algorithm import OnPolicyAlgorithm
 from stable_baselines3.common.policies import ActorCriticCnnPolicy, ActorCriticPolicy, BasePolicy, \
     MultiInputActorCriticPolicy
@@ -69,6 +70,9 @@ class PPO(OnPolicyAlgorithm):
         instead of action noise exploration (default: False)
     :param sde_sample_freq: Sample a new noise matrix every n steps when using gSDE
         Default: -1 (only sample at the beginning of the rollout)
+    :param rollout_buffer_class: Rollout buffer class to use.
+        If ``None``, it will be automatically selected.
+    :param rollout_buffer_kwargs: Keyword arguments to pass to the rollout buffer on creation.
     :param target_kl: Limit the KL divergence between updates,
         because the clipping is not enough to prevent large update
         see issue #213 (cf https://github.com/hill-a/stable-baselines/issues/213)
@@ -82,6 +86,11 @@ class PPO(OnPolicyAlgorithm):
     :param device: Device (cpu, cuda, ...) on which the code should be run.
         Setting it to auto, the code will be run on the GPU if possible.
     :param _init_setup_model: Whether or not to build the network at the creation of the instance
+    :param use_bf16: Whether to run the features extractor and the shared MLP of the training loop
+        under bfloat16 autocast. The action/value heads and the log probabilities are computed in float32
+        (from bf16-rounded latents), the parameters, gradients and optimizer states stay in float32,
+        so no loss scaling is needed. Compare ``train/first_approx_kl`` with a float32 run
+        to check the drift of the ratio at the first minibatch.
     """
 
     policy_aliases: Dict[str, Type[BasePolicy]] = {
@@ -109,6 +118,8 @@ class PPO(OnPolicyAlgorithm):
             max_grad_norm: float = 0.5,
             use_sde: bool = False,
             sde_sample_freq: int = -1,
+            rollout_buffer_class: Optional[Type[RolloutBuffer]] = None,
+            rollout_buffer_kwargs: Optional[Dict[str, Any]] = None,
             target_kl: Optional[float] = None,
             tensorboard_log: Optional[str] = None,
             create_eval_env: bool = False,
@@ -120,6 +131,7 @@ class PPO(OnPolicyAlgorithm):
             adaptive_kl: float = 0.02,
             min_lr=1e-4,
             max_lr=1e-3,
+            use_bf16: bool = False,
     ):
 
         super().__init__(
@@ -134,6 +146,8 @@ class PPO(OnPolicyAlgorithm):
             max_grad_norm=max_grad_norm,
             use_sde=use_sde,
             sde_sample_freq=sde_sample_freq,
+            rollout_buffer_class=rollout_buffer_class,
+            rollout_buffer_kwargs=rollout_buffer_kwargs,
             tensorboard_log=tensorboard_log,
             policy_kwargs=policy_kwargs,
             verbose=verbose,
@@ -180,6 +194,7 @@ class PPO(OnPolicyAlgorithm):
         self.clip_range_vf = clip_range_vf
         self.normalize_advantage = normalize_advantage
         self.target_kl = target_kl
+        self.use_bf16 = use_bf16
         self.kl_scheduler = AdaptiveScheduler(kl_threshold=adaptive_kl, min_lr=min_lr, max_lr=max_lr,
                                               init_lr=learning_rate)
 
@@ -216,6 +231,7 @@ class PPO(OnPolicyAlgorithm):
         clip_fractions = []
 
         continue_training = True
+        first_approx_kl = None
 
         # train for n_epochs epochs
         for epoch in range(self.n_epochs):
@@ -231,7 +247,9 @@ class PPO(OnPolicyAlgorithm):
                 if self.use_sde:
                     self.policy.reset_noise(self.batch_size)
 
-                values, log_prob, entropy = self.policy.evaluate_actions(rollout_data.observations, actions)
+                values, log_prob, entropy = self.policy.evaluate_actions(
+                    rollout_data.observations, actions, use_bf16=self.use_bf16
+                )
                 values = values.flatten()
                 # Normalize advantage
                 advantages = rollout_data.advantages
@@ -283,6 +301,8 @@ class PPO(OnPolicyAlgorithm):
                     log_ratio = log_prob - rollout_data.old_log_prob
                     approx_kl_div = th.mean((th.exp(log_ratio) - 1) - log_ratio).cpu().numpy()
                     approx_kl_divs.append(approx_kl_div)
+                    if first_approx_kl is None:
+                        first_approx_kl = approx_kl_div
 
                 if self.target_kl is not None and approx_kl_div > 1.5 * self.target_kl:
                     continue_training = False
@@ -311,6 +331,9 @@ class PPO(OnPolicyAlgorithm):
         self.logger.record("train/policy_gradient_loss", np.mean(pg_losses))
         self.logger.record("train/value_loss", np.mean(value_losses))
         self.logger.record("train/approx_kl", np.mean(approx_kl_divs))
+        # Evaluated with the rollout parameters, so only the numerics (e.g. bf16) and the batch norm
+        # statistics (batch vs running) make it differ from 0
+        self.logger.record("train/first_approx_kl", first_approx_kl)
         self.logger.record("train/clip_fraction", np.mean(clip_fractions))
         self.logger.record("train/loss", loss.item())
         self.logger.record("train/explained_variance", explained_var)
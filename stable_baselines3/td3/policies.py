@@ -104,6 +104,8 @@ class TD3Policy(BasePolicy):
     :param n_critics: Number of critic networks to create.
     :param share_features_extractor: Whether to share or not the features extractor
         between the actor and the critic (this saves computation time)
+    :param use_jit: Whether to compile the actor and critic MLPs with ``th.jit.script``
+        (reduces the Python overhead of small networks)
     """
 
     def __init__(
@@ -120,6 +122,7 @@ class TD3Policy(BasePolicy):
         optimizer_kwargs: Optional[Dict[str, Any]] = None,
         n_critics: int = 2,
         share_features_extractor: bool = True,
+        use_jit: bool = False,
     ):
         super().__init__(
             observation_space,
@@ -162,6 +165,7 @@ class TD3Policy(BasePolicy):
         self.actor, self.actor_target = None, None
         self.critic, self.critic_target = None, None
         self.share_features_extractor = share_features_extractor
+        self.use_jit = use_jit
 
         self._build(lr_schedule)
 
@@ -172,6 +176,10 @@ class TD3Policy(BasePolicy):
         self.actor_target = self.make_actor(features_extractor=None)
         # Initialize the target to have the same weights as the actor
         self.actor_target.load_state_dict(self.actor.state_dict())
+        if self.use_jit:
+            # Script before creating the optimizer so it holds the parameters of the compiled modules
+            for actor in (self.actor, self.actor_target):
+                actor.mu = th.jit.script(actor.mu)
 
         self.actor.optimizer = self.optimizer_class(self.actor.parameters(), lr=lr_schedule(1), **self.optimizer_kwargs)
 
@@ -189,6 +197,11 @@ class TD3Policy(BasePolicy):
             self.critic_target = self.make_critic(features_extractor=None)
 
         self.critic_target.load_state_dict(self.critic.state_dict())
+        if self.use_jit:
+            for critic in (self.critic, self.critic_target):
+                critic.q_networks = [th.jit.script(q_net) for q_net in critic.q_networks]
+                for idx, q_net in enumerate(critic.q_networks):
+                    critic.add_module(f"qf{idx}", q_net)
         self.critic.optimizer = self.optimizer_class(self.critic.parameters(), lr=lr_schedule(1), **self.optimizer_kwargs)
 
         # Target networks should always be in eval mode
@@ -209,6 +222,7 @@ class TD3Policy(BasePolicy):
                 features_extractor_class=self.features_extractor_class,
                 features_extractor_kwargs=self.features_extractor_kwargs,
                 share_features_extractor=self.share_features_extractor,
+                use_jit=self.use_jit,
             )
         )
         return data
@@ -266,6 +280,8 @@ class CnnPolicy(TD3Policy):
     :param n_critics: Number of critic networks to create.
     :param share_features_extractor: Whether to share or not the features extractor
         between the actor and the critic (this saves computation time)
+    :param use_jit: Whether to compile the actor and critic MLPs with ``th.jit.script``
+        (reduces the Python overhead of small networks)
     """
 
     def __init__(
@@ -282,6 +298,7 @@ class CnnPolicy(TD3Policy):
         optimizer_kwargs: Optional[Dict[str, Any]] = None,
         n_critics: int = 2,
         share_features_extractor: bool = True,
+        use_jit: bool = False,
     ):
         super().__init__(
             observation_space,
@@ -296,6 +313,7 @@ class CnnPolicy(TD3Policy):
             optimizer_kwargs,
             n_critics,
             share_features_extractor,
+            use_jit,
         )
 
 
@@ -320,6 +338,8 @@ class MultiInputPolicy(TD3Policy):
     :param n_critics: Number of critic networks to create.
     :param share_features_extractor: Whether to share or not the features extractor
         between the actor and the critic (this saves computation time)
+    :param use_jit: Whether to compile the actor and critic MLPs with ``th.jit.script``
+        (reduces the Python overhead of small networks)
     """
 
     def __init__(
@@ -336,6 +356,7 @@ class MultiInputPolicy(TD3Policy):
         optimizer_kwargs: Optional[Dict[str, Any]] = None,
         n_critics: int = 2,
         share_features_extractor: bool = True,
+        use_jit: bool = False,
     ):
         super().__init__(
             observation_space,
@@ -350,4 +371,5 @@ class MultiInputPolicy(TD3Policy):
             optimizer_kwargs,
             n_critics,
             share_features_extractor,
+            use_jit,
         )
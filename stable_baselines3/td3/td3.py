@@ -59,6 +59,8 @@ class TD3(OffPolicyAlgorithm):
     :param device: Device (cpu, cuda, ...) on which the code should be run.
         Setting it to auto, the code will be run on the GPU if possible.
     :param _init_setup_model: Whether or not to build the network at the creation of the instance
+    :param prefetch_samples: Whether to sample the replay buffer minibatches of ``train()`` ahead,
+        in a background thread (only used on GPU and with more than one gradient step)
     """
 
     policy_aliases: Dict[str, Type[BasePolicy]] = {
@@ -93,6 +95,7 @@ class TD3(OffPolicyAlgorithm):
         seed: Optional[int] = None,
         device: Union[th.device, str] = "auto",
         _init_setup_model: bool = True,
+        prefetch_samples: bool = False,
     ):
 
         super().__init__(
@@ -124,6 +127,7 @@ class TD3(OffPolicyAlgorithm):
         self.policy_delay = policy_delay
         self.target_noise_clip = target_noise_clip
         self.target_policy_noise = target_policy_noise
+        self.prefetch_samples = prefetch_samples
 
         if _init_setup_model:
             self._setup_model()
@@ -147,11 +151,18 @@ class TD3(OffPolicyAlgorithm):
 
         actor_losses, critic_losses = [], []
 
-        for _ in range(gradient_steps):
+        if self.prefetch_samples:
+            # The next minibatches are prepared while the current one is used
+            replay_samples = self.replay_buffer.prefetch(batch_size, gradient_steps, env=self._vec_normalize_env)
+        else:
+            replay_samples = (
+                self.replay_buffer.sample(batch_size, env=self._vec_normalize_env) for _ in range(gradient_steps)
+            )
+
+        # Sample replay buffer
+        for replay_data in replay_samples:
 
             self._n_updates += 1
-            # Sample replay buffer
-            replay_data = self.replay_buffer.sample(batch_size, env=self._vec_normalize_env)
 
             with th.no_grad():
                 # Select action according to policy and add clipped noise